@@ -1,138 +1,524 @@
 import json
-import requests
-from flask import Flask, render_template, request, jsonify, session
+import heapq
+from operator import itemgetter
+import orjson
+import httpx
+import redis
+from flask import Flask, Response, render_template, request, jsonify, session
 from datetime import datetime
+from email.utils import parsedate_to_datetime
+from dataclasses import dataclass
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
+import math
+import os
 import time
 import secrets
+import threading
+from cachetools import TLRUCache
 
 app = Flask(__name__)
 app.secret_key = secrets.token_hex(16)
 
 BASE_URL = "https://fantasy.premierleague.com/api/"
-MAX_WORKERS = 5  # Reduced for memory constraints on free tier
+STANDINGS_URL = BASE_URL + "leagues-classic/{}/standings/?page_standings={}"
+PICKS_URL = BASE_URL + "entry/{}/event/{}/picks/"
+BOOTSTRAP_URL = BASE_URL + "bootstrap-static/"
+MAX_WORKERS = 50  # Each worker is one HTTP/2 stream, not a socket
+LEAGUE_PAGE_CHUNK = 8  # Standings pages requested in parallel per round
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_ERRORS = (httpx.ReadTimeout, httpx.RemoteProtocolError)
+MAX_RETRY_AFTER = 30  # Cap on a server-requested Retry-After wait, in seconds
 
+# Shared HTTP/2 client: every FPL call is multiplexed over a few warm
+# connections instead of opening a socket per in-flight request.
+# Transport retries cover connection errors; fetch_data retries read errors
+# and transient statuses.
+CLIENT = httpx.Client(transport=httpx.HTTPTransport(
+    http2=True,
+    retries=MAX_RETRIES,
+    limits=httpx.Limits(max_keepalive_connections=4, max_connections=100)
+))
 
-def fetch_data(url, timeout=10):
+# Leaderboard rows are kept as plain tuples in this column order and only
+# turned into dicts when the response is serialized.
+LEADERBOARD_FIELDS = ('manager_name', 'player_name', 'team_id', 'gw_points',
+                      'transfer_cost', 'net_points', 'total_points', 'overall_rank')
+GW_POINTS = LEADERBOARD_FIELDS.index('gw_points')
+STREAM_CHUNK_ROWS = 500  # Rows encoded per chunk of the streamed response
+PROGRESS_INTERVAL = 0.25  # Minimum seconds between progress updates (4Hz)
+
+# The only standings fields the leaderboard reads; the rest is dropped before caching.
+STANDINGS_FIELDS = ('entry', 'entry_name', 'player_name', 'total', 'rank')
+
+# Long-lived pools shared by every request so worker threads are reused
+# instead of being spawned and torn down per leaderboard.
+# Threads start lazily, so this is safe under gunicorn's pre-fork model.
+EXECUTOR = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+PAGE_EXECUTOR = ThreadPoolExecutor(max_workers=LEAGUE_PAGE_CHUNK)
+
+# Leaderboard builds allowed to run at once per process; further requests get
+# a 503 rather than piling more work onto the shared pools. Cached leaderboards
+# don't take a slot. Only matters with threaded workers (e.g. gunicorn --threads).
+MAX_CONCURRENT_BUILDS = 4
+BUILD_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENT_BUILDS)
+
+# Cached FPL responses stay fresh for their TTL, then linger for STALE_GRACE
+# seconds so they can still be served if FPL is down or rate limiting us.
+PICKS_TTL = 120
+FINISHED_PICKS_TTL = 3600  # Points for a finished, data-checked gameweek don't change
+LEAGUE_TTL = 60
+BOOTSTRAP_TTL = 300
+BOOTSTRAP_TIMEOUT = 3  # bootstrap-static is only a hint, so it gets one short attempt
+BOOTSTRAP_FAILURE_BACKOFF = 15  # Seconds to skip it after a failed fetch
+STALE_GRACE = 600
+
+# With REDIS_URL set, the cache lives in Redis and is shared by every gunicorn
+# worker and survives restarts; otherwise each process keeps its own copy.
+REDIS_URL = os.environ.get('REDIS_URL')
+# Short socket timeouts so a slow or unreachable Redis degrades to cache
+# misses instead of blocking every executor thread.
+REDIS = (redis.Redis.from_url(REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
+         if REDIS_URL else None)
+
+# In-process fallback, shared across worker threads, hence the lock. Each
+# entry carries its own expiry, so TTLs can differ within one cache.
+CACHES = {
+    name: TLRUCache(maxsize=maxsize, ttu=lambda _key, entry, _now: entry['expires_at'],
+                    timer=time.time)
+    for name, maxsize in (('picks', 50000), ('standings', 256),
+                          ('bootstrap', 1), ('leaderboard', 64))
+}
+CACHE_LOCK = threading.Lock()
+
+bootstrap_failed_at = 0.0  # When this process last failed to fetch bootstrap-static
+
+NOT_MODIFIED = object()  # fetch_data result when a conditional request gets a 304
+FETCH_FAILED = object()  # fetch_manager_gw_data result when the picks fetch failed
+
+
+def retry_delay(response, attempt):
+    """Seconds to wait before retrying response, honouring Retry-After if sent"""
+    retry_after = response.headers.get('Retry-After')
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                delay = None
+        if delay is not None and math.isfinite(delay):
+            return min(max(delay, 0), MAX_RETRY_AFTER)
+    return RETRY_BACKOFF * (2 ** attempt)
+
+
+def fetch_data(url, timeout=10, etag=None, retries=MAX_RETRIES):
+    """Fetch url and decode its JSON body, returning (data, etag).
+
+    Passing a cached etag makes the request conditional: a 304 comes back
+    as (NOT_MODIFIED, etag). A 404 decodes as an empty object, since the
+    resource legitimately doesn't exist. data is None on any failure.
+    """
+    headers = {'If-None-Match': etag} if etag else None
     try:
-        response = requests.get(url, timeout=timeout)
+        for attempt in range(retries + 1):
+            try:
+                response = CLIENT.get(url, headers=headers, timeout=timeout)
+            except RETRY_ERRORS:
+                # The transport only retries connect failures; retry these too
+                if attempt == retries:
+                    raise
+                time.sleep(RETRY_BACKOFF * (2 ** attempt))
+                continue
+
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                break
+            time.sleep(retry_delay(response, attempt))
+
+        if response.status_code == 304 and etag:
+            return NOT_MODIFIED, etag
+        if response.status_code == 404:
+            return {}, None
         if response.status_code != 200:
-            return None
-        return response.json()
+            return None, None
+        return orjson.loads(response.content), response.headers.get('ETag')
     except Exception as e:
         print(f"Error fetching {url}: {e}")
+        return None, None
+
+
+def cache_get(name, key):
+    """Return the cached {'fresh_until', 'etag', 'body'} entry for key, or None. It may be stale."""
+    if REDIS is None:
+        with CACHE_LOCK:
+            return CACHES[name].get(key)
+
+    try:
+        entry = REDIS.hgetall(f"{name}:{key}")
+        if not entry:
+            return None
+        return {
+            'fresh_until': float(entry[b'fresh_until']),
+            'etag': entry.get(b'etag', b'').decode() or None,
+            'body': orjson.loads(entry[b'body'])
+        }
+    except (redis.RedisError, KeyError, ValueError) as e:
+        # ValueError covers orjson.JSONDecodeError and a malformed fresh_until
+        print(f"Error reading cache {name}:{key}: {e}")
         return None
 
 
-def fetch_league_data(league_id):
-    """Fetch all teams from the league by handling pagination"""
-    all_results = []
-    page = 1
+def cache_set(name, key, body, ttl, grace=0, etag=None):
+    """Cache body as fresh for ttl seconds, kept for a further grace seconds."""
+    entry = {'fresh_until': time.time() + ttl, 'etag': etag, 'body': body}
+    if REDIS is None:
+        with CACHE_LOCK:
+            CACHES[name][key] = {**entry, 'expires_at': entry['fresh_until'] + grace}
+        return
+
+    redis_key = f"{name}:{key}"
+    try:
+        pipe = REDIS.pipeline()
+        pipe.hset(redis_key, mapping={'fresh_until': entry['fresh_until'],
+                                      'etag': etag or '',
+                                      'body': orjson.dumps(body)})
+        pipe.expire(redis_key, ttl + grace)
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"Error writing cache {redis_key}: {e}")
 
-    while True:
-        url = BASE_URL + f"leagues-classic/{league_id}/standings/?page_standings={page}"
-        data = fetch_data(url)
 
-        if not data or 'standings' not in data:
-            break
+def cached_fetch(name, key, url, ttl, extract=None, timeout=10, retries=MAX_RETRIES):
+    """Return data for url, served from cache while fresh.
 
-        results = data['standings']['results']
-        if not results:
-            break
+    A stale entry is revalidated with its ETag, so an unchanged resource
+    costs a bodiless 304. extract, if given, trims the payload before it is
+    cached; returning None or raising on an unexpected shape counts as a
+    failure. If the refetch
+    fails, the stale entry (if any) is returned instead. Failures are never
+    cached.
+    """
+    entry = cache_get(name, key)
+    if entry and time.time() < entry['fresh_until']:
+        return entry['body']
 
-        all_results.extend(results)
+    data, etag = fetch_data(url, timeout=timeout, etag=entry['etag'] if entry else None,
+                            retries=retries)
+    if data is NOT_MODIFIED:
+        cache_set(name, key, entry['body'], ttl, STALE_GRACE, etag)
+        return entry['body']
+    if data is not None and extract is not None:
+        try:
+            data = extract(data)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Error extracting {url}: {e}")
+            data = None
+    if data is not None:
+        cache_set(name, key, data, ttl, STALE_GRACE, etag)
+        return data
 
-        if not data['standings'].get('has_next', False):
-            break
+    return entry['body'] if entry else None
 
-        page += 1
 
-    if all_results:
-        data['standings']['results'] = all_results
+def slim_standings_page(data):
+    """Reduce a standings payload to the manager fields the leaderboard reads"""
+    standings = data.get('standings')
+    if not standings:
+        return None
+    return {
+        'results': [{field: result[field] for field in STANDINGS_FIELDS}
+                    for result in standings['results']],
+        'has_next': standings.get('has_next', False)
+    }
 
-    return data
 
+def fetch_league_page(league_id, page):
+    """Fetch one standings page as {'results': [...], 'has_next': bool}"""
+    url = STANDINGS_URL.format(league_id, page)
+    return cached_fetch('standings', f"{league_id}:{page}", url, LEAGUE_TTL,
+                        extract=slim_standings_page)
 
-def fetch_manager_history(team_id):
-    url = BASE_URL + f"entry/{team_id}/history/"
-    return fetch_data(url)
 
+def fetch_league_pages(league_id):
+    """Yield the league's standings results one page at a time, in page order.
 
-def get_gw_leaderboard_with_progress(league_id, gameweek):
-    """Fetch league data and create leaderboard - returns generator for progress"""
-    league_data = fetch_league_data(league_id)
-    
-    if not league_data:
-        yield {'error': 'Failed to fetch league data'}
+    Page 1 is fetched on its own; after that up to LEAGUE_PAGE_CHUNK later
+    pages stay in flight, so page N+1 is already downloading while the
+    caller works through page N. Yields nothing if page 1 cannot be fetched,
+    and a final None if a later page fails, so the caller knows the league
+    is incomplete.
+    """
+    data = fetch_league_page(league_id, 1)
+    if not data:
         return
+
+    yield data['results']
+    if not data['results'] or not data['has_next']:
+        return
+
+    next_page = 2 + LEAGUE_PAGE_CHUNK
+    pending = deque(PAGE_EXECUTOR.submit(fetch_league_page, league_id, page)
+                    for page in range(2, next_page))
+    try:
+        while pending:
+            data = pending.popleft().result()
+            if not data:
+                yield None
+                return
+            if not data['results']:
+                return
+
+            if data['has_next']:
+                pending.append(PAGE_EXECUTOR.submit(fetch_league_page, league_id, next_page))
+                next_page += 1
+
+            yield data['results']
+
+            if not data['has_next']:
+                return
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def slim_bootstrap_events(data):
+    """Reduce bootstrap-static to {gameweek: {'deadline': epoch, 'finished': bool}}"""
+    events = data.get('events')
+    if not events:
+        return None
+    return {
+        str(event['id']): {
+            'deadline': (datetime.fromisoformat(event['deadline_time']).timestamp()
+                         if event.get('deadline_time') else None),
+            'finished': bool(event['finished'] and event['data_checked'])
+        }
+        for event in events
+    }
+
+
+def fetch_gameweek_status(gameweek):
+    """Return 'finished', 'live' or 'upcoming' for gameweek, or None if unknown.
+
+    bootstrap-static is large but shared by every league and manager, so it is
+    fetched once per BOOTSTRAP_TTL and cached as just each gameweek's deadline
+    and finished flag. Whether the deadline has passed is decided against the
+    clock at call time, so a stale cached copy can't hold a gameweek back as
+    upcoming once it has gone live.
+
+    The status is only a hint, so the fetch gets one short attempt, and after
+    a failure this process uses whatever is cached (possibly nothing) for
+    BOOTSTRAP_FAILURE_BACKOFF seconds instead of refetching.
+    """
+    global bootstrap_failed_at
+    entry = cache_get('bootstrap', 'gameweeks')
+    fresh = entry and time.time() < entry['fresh_until']
+    if fresh or time.time() - bootstrap_failed_at < BOOTSTRAP_FAILURE_BACKOFF:
+        events = entry['body'] if entry else None
+    else:
+        events = cached_fetch('bootstrap', 'gameweeks', BOOTSTRAP_URL, BOOTSTRAP_TTL,
+                              extract=slim_bootstrap_events, timeout=BOOTSTRAP_TIMEOUT,
+                              retries=0)
+        # cached_fetch falls back to the stale copy on failure; note it either way
+        entry = cache_get('bootstrap', 'gameweeks')
+        if not entry or time.time() >= entry['fresh_until']:
+            bootstrap_failed_at = time.time()
+
+    event = events.get(str(gameweek)) if events else None
+    if not event:
+        return None
+    if event['finished']:
+        return 'finished'
+    if event['deadline'] is None or time.time() >= event['deadline']:
+        return 'live'
+    return 'upcoming'
+
+
+def slim_picks(data):
+    """Keep only the gameweek points and transfer cost from a picks payload.
+
+    A manager with no entry for the gameweek (e.g. joined later) is cached
+    as an empty dict, distinct from a failed fetch.
+    """
+    history = data.get('entry_history')
+    if not history:
+        return {}
+    return {'entry_history': {'points': history['points'],
+                              'event_transfers_cost': history['event_transfers_cost']}}
+
+
+def fetch_manager_picks(team_id, gameweek, ttl=PICKS_TTL):
+    """Fetch one manager's gameweek; its entry_history carries that week's points"""
+    url = PICKS_URL.format(team_id, gameweek)
+    return cached_fetch('picks', f"{team_id}:{gameweek}", url, ttl, extract=slim_picks)
+
+
+def fetch_manager_gw_data(manager, gameweek, picks_ttl=PICKS_TTL):
+    """Build one leaderboard row for manager.
+
+    Returns None if the manager has no entry for the gameweek, or
+    FETCH_FAILED if their picks could not be fetched.
+    """
+    try:
+        team_id = manager['entry']
+        picks = fetch_manager_picks(team_id, gameweek, picks_ttl)
+        if picks is None:
+            return FETCH_FAILED
+        
+        if 'entry_history' in picks:
+            gw_points = picks['entry_history']['points']
+            transfer_cost = picks['entry_history']['event_transfers_cost']
+            net_points = gw_points - transfer_cost
+            
+            return (
+                manager['entry_name'],
+                manager['player_name'],
+                manager['entry'],
+                gw_points,
+                transfer_cost,
+                net_points,
+                manager['total'],
+                manager['rank']
+            )
+    except Exception as e:
+        print(f"Error processing manager {manager.get('entry')}: {e}")
+        return FETCH_FAILED
+    return None
+
+
+@dataclass
+class Progress:
+    """Progress of one leaderboard build.
+
+    The generator yields this same object on every update rather than a
+    fresh dict, and only the generator's own thread mutates it.
+    """
+    total: int = 0
+    processed: int = 0
+    failed: int = 0  # Managers or standings pages that could not be fetched
+    status: str = 'started'
+    data: list = None
+    error: str = None
+
+
+def leaderboard_cache_key(league_id, gameweek, limit):
+    return f"{league_id}:{gameweek}:{limit}"
+
+
+def get_cached_leaderboard(league_id, gameweek, limit=None):
+    """Return a completed Progress for a fresh cached leaderboard, or None"""
+    cached = cache_get('leaderboard', leaderboard_cache_key(league_id, gameweek, limit))
+    if not cached or time.time() >= cached['fresh_until']:
+        return None
+    return Progress(total=cached['body']['total'], status='completed',
+                    data=cached['body']['data'])
+
+
+def get_gw_leaderboard_with_progress(league_id, gameweek, limit=None):
+    """Fetch league data and create leaderboard - returns generator for progress.
+
+    With a limit, only the top `limit` managers by gameweek points are kept,
+    via a bounded min-heap, so the tail of a large league is never sorted.
+    Always builds; check get_cached_leaderboard first for a cached result.
+    """
+    # The gameweek status hint is fetched alongside standings page 1
+    status_future = PAGE_EXECUTOR.submit(fetch_gameweek_status, gameweek)
+    pages = fetch_league_pages(league_id)
+    first_page = next(pages, None)
+
+    gameweek_status = status_future.result()
+    if gameweek_status == 'upcoming':
+        pages.close()
+        yield Progress(status='error', error=f'Gameweek {gameweek} has not started yet')
+        return
+    picks_ttl = FINISHED_PICKS_TTL if gameweek_status == 'finished' else PICKS_TTL
     
-    managers = league_data['standings']['results']
-    total_managers = len(managers)
+    if first_page is None:
+        yield Progress(status='error', error='Failed to fetch league data')
+        return
     
-    yield {
-        'status': 'started',
-        'total': total_managers,
-        'processed': 0,
-        'percentage': 0
-    }
+    # total is a running count until the last standings page has arrived
+    progress = Progress(total=len(first_page))
+    yield progress
+    last_yield = time.monotonic()
     
     leaderboard = []
-    processed_count = 0
+    seq = 0  # Heap tiebreak: earlier completions win ties, matching the stable sort
     
-    # Fetch history for all managers in parallel
-    def fetch_manager_gw_data(manager):
-        try:
-            team_id = manager['entry']
-            history = fetch_manager_history(team_id)
-            
-            if history and len(history['current']) >= gameweek:
-                gw_points = history['current'][gameweek - 1]['points']
-                transfer_cost = history['current'][gameweek - 1]['event_transfers_cost']
-                net_points = gw_points - transfer_cost
-                
-                return {
-                    'manager_name': manager['entry_name'],
-                    'player_name': manager['player_name'],
-                    'team_id': manager['entry'],
-                    'gw_points': gw_points,
-                    'transfer_cost': transfer_cost,
-                    'net_points': net_points,
-                    'total_points': manager['total'],
-                    'overall_rank': manager['rank']
-                }
-        except Exception as e:
-            print(f"Error processing manager {manager.get('entry')}: {e}")
-        return None
-    
-    # Process in smaller batches to reduce memory
-    batch_size = 50
-    for i in range(0, len(managers), batch_size):
-        batch = managers[i:i + batch_size]
-        
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            futures = [executor.submit(fetch_manager_gw_data, mgr) for mgr in batch]
-            
-            for future in as_completed(futures):
-                result = future.result()
-                if result:
+    # Submit each page's managers as soon as it arrives, so gameweek fetches
+    # overlap the remaining standings pages; the executor queues the excess.
+    futures = []
+    try:
+        futures.extend(EXECUTOR.submit(fetch_manager_gw_data, mgr, gameweek, picks_ttl)
+                       for mgr in first_page)
+        for page in pages:
+            if page is None:
+                progress.failed += 1
+                continue
+            futures.extend(EXECUTOR.submit(fetch_manager_gw_data, mgr, gameweek, picks_ttl)
+                           for mgr in page)
+            progress.total += len(page)
+            yield progress
+
+        for future in as_completed(futures):
+            result = future.result()
+            if result is FETCH_FAILED:
+                progress.failed += 1
+            elif result:
+                if limit is None:
                     leaderboard.append(result)
-                processed_count += 1
-                
-                # Yield progress every 10 managers
-                if processed_count % 10 == 0 or processed_count == total_managers:
-                    yield {
-                        'status': 'processing',
-                        'total': total_managers,
-                        'processed': processed_count,
-                        'percentage': int((processed_count / total_managers) * 100)
-                    }
+                else:
+                    entry = (result[GW_POINTS], -seq, result)
+                    if len(leaderboard) < limit:
+                        heapq.heappush(leaderboard, entry)
+                    else:
+                        heapq.heappushpop(leaderboard, entry)
+                    seq += 1
+            progress.processed += 1
+
+            # Coalesce progress updates to at most one per PROGRESS_INTERVAL
+            now = time.monotonic()
+            if now - last_yield >= PROGRESS_INTERVAL or progress.processed == progress.total:
+                last_yield = now
+                progress.status = 'processing'
+                yield progress
+    finally:
+        # Don't leave this build's queued fetches holding the shared pool
+        # if it stops early (a failed page, an error, a closed generator)
+        for future in futures:
+            future.cancel()
+        pages.close()
     
-    leaderboard.sort(key=lambda x: x['gw_points'], reverse=True)
+    if limit is None:
+        leaderboard.sort(key=itemgetter(GW_POINTS), reverse=True)
+    else:
+        leaderboard = [entry[2] for entry in sorted(leaderboard, reverse=True)]
     
-    yield {
-        'status': 'completed',
-        'data': leaderboard
-    }
+    # A leaderboard missing managers is served once but never cached. It can't
+    # be fresher than its picks, so it shares their gameweek-dependent TTL.
+    if not progress.failed:
+        cache_set('leaderboard', leaderboard_cache_key(league_id, gameweek, limit),
+                  {'total': progress.total, 'data': leaderboard}, picks_ttl)
+
+    progress.status = 'completed'
+    progress.data = leaderboard
+    yield progress
+
+
+def stream_leaderboard_json(meta, rows):
+    """Yield meta as a JSON object whose 'leaderboard' array is streamed in chunks.
+
+    Only one chunk of row dicts is alive at a time, so peak memory stays flat
+    however large the league is.
+    """
+    yield orjson.dumps(meta)[:-1] + b',"leaderboard":['
+    for i in range(0, len(rows), STREAM_CHUNK_ROWS):
+        chunk = b','.join(orjson.dumps(dict(zip(LEADERBOARD_FIELDS, row)))
+                          for row in rows[i:i + STREAM_CHUNK_ROWS])
+        yield chunk if i == 0 else b',' + chunk
+    yield b']}'
 
 
 @app.route('/')
@@ -145,23 +531,39 @@ def leaderboard():
     try:
         gameweek = int(request.form.get('gameweek'))
         league_id = int(request.form.get('league_id'))
+        limit = request.form.get('limit', type=int)
+        if limit is not None and limit < 1:
+            return jsonify({'error': 'limit must be at least 1'}), 400
         
-        # Process synchronously and return result
-        result = None
-        for progress in get_gw_leaderboard_with_progress(league_id, gameweek):
-            if progress['status'] == 'completed':
-                result = {
-                    'status': 'completed',
-                    'gameweek': gameweek,
-                    'league_id': league_id,
-                    'leaderboard': progress['data'],
-                    'total_managers': len(progress['data'])
-                }
+        # Cache hits are served without taking a build slot
+        result = get_cached_leaderboard(league_id, gameweek, limit)
+        error = 'Failed to fetch data'
+        
+        if result is None:
+            if not BUILD_SLOTS.acquire(blocking=False):
+                return jsonify({'error': 'Server is busy, please try again shortly'}), 503
+            
+            # Process synchronously and return result
+            try:
+                for progress in get_gw_leaderboard_with_progress(league_id, gameweek, limit):
+                    if progress.status == 'completed':
+                        result = progress
+                    elif progress.status == 'error':
+                        error = progress.error
+            finally:
+                BUILD_SLOTS.release()
         
         if result:
-            return jsonify(result)
+            meta = {
+                'status': 'completed',
+                'gameweek': gameweek,
+                'league_id': league_id,
+                'total_managers': result.total
+            }
+            return Response(stream_leaderboard_json(meta, result.data),
+                            mimetype='application/json')
         else:
-            return jsonify({'error': 'Failed to fetch data'}), 400
+            return jsonify({'error': error}), 400
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500